@@ -16,7 +16,7 @@ sys.path.insert(0, str(Path(__file__).parent / "src"))
 
 from mcp.server.fastmcp import FastMCP
 from src.mistralocr.config import settings
-from src.mistralocr.tools import register_ocr_tools
+from src.mistralocr.tools import ocr_lifespan, register_ocr_tools
 
 def _configure_logging() -> None:
     level_name = (settings.log_level if settings else "INFO").upper()
@@ -32,7 +32,8 @@ _configure_logging()
 
 mcp = FastMCP(
     name=settings.server_name if settings else "MistralOCR",
-    instructions="OCR server for PDFs, documents, and images using Mistral AI"
+    instructions="OCR server for PDFs, documents, and images using Mistral AI",
+    lifespan=ocr_lifespan,
 )
 
 register_ocr_tools(mcp)
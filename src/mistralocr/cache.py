@@ -14,10 +14,27 @@ from pathlib import Path
 from typing import Optional
 from datetime import datetime, timedelta
 
+try:
+    # Optional SIMD tree hash; several times faster than SHA-256 on multi-MB payloads
+    from blake3 import blake3 as _content_hasher
+except ImportError:
+    _content_hasher = hashlib.sha256
+
 logger = logging.getLogger(__name__)
 
-# Chunk size for hashing large documents (64KB)
-HASH_CHUNK_SIZE = 65536
+
+def content_key(data: bytes, namespace: str = "") -> str:
+    """Generate hash from raw document bytes plus an optional namespace (cache version/options).
+
+    Uses BLAKE3 when installed, otherwise SHA-256. The payload is hashed in
+    one update (which releases the GIL for large inputs).
+    """
+    h = _content_hasher()
+    if namespace:
+        h.update(namespace.encode("utf-8"))
+        h.update(b"\0")
+    h.update(data)
+    return h.hexdigest()[:16]
 
 
 class LRUCache:
@@ -78,35 +95,21 @@ class OCRCache:
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         self._memory_cache = LRUCache(maxsize=memory_cache_size)
 
-    def _hash_content(self, data: str, namespace: str = "") -> str:
-        """Generate hash from base64 content plus an optional namespace (cache version/options).
-
-        Uses chunked hashing for better performance with large documents.
-        """
-        h = hashlib.sha256()
-        if namespace:
-            h.update(namespace.encode("utf-8"))
-            h.update(b"\0")
-        # Hash in chunks for large documents (more memory efficient)
-        data_bytes = data.encode("utf-8")
-        for i in range(0, len(data_bytes), HASH_CHUNK_SIZE):
-            h.update(data_bytes[i:i + HASH_CHUNK_SIZE])
-        return h.hexdigest()[:16]
-
     def _cache_path(self, content_hash: str) -> Path:
         return self.cache_dir / f"{content_hash}.json"
 
-    def get(self, base64_data: str, namespace: str = "") -> Optional[dict]:
+    def get(self, content: bytes, namespace: str = "", content_hash: Optional[str] = None) -> Optional[dict]:
         """Get cached result if exists and not expired.
 
-        Checks in-memory LRU cache first, then falls back to disk.
+        Checks in-memory LRU cache first, then falls back to disk. content_hash
+        may be passed when the caller already computed content_key(content, namespace).
         """
-        content_hash = self._hash_content(base64_data, namespace=namespace)
+        content_hash = content_hash or content_key(content, namespace)
 
         # Check memory cache first (fast path)
         memory_result = self._memory_cache.get(content_hash)
         if memory_result is not None:
-            logger.debug(f"Memory cache hit: {content_hash}")
+            logger.debug("Memory cache hit: %s", content_hash)
             return memory_result
 
         # Fall back to disk cache
@@ -129,7 +132,7 @@ class OCRCache:
                 return None
 
             result = data.get("result")
-            logger.info(f"Disk cache hit: {content_hash}")
+            logger.info("Disk cache hit: %s", content_hash)
 
             # Populate memory cache for next access
             if result is not None:
@@ -144,10 +147,10 @@ class OCRCache:
                     pass
             return None
 
-    def set(self, base64_data: str, result: dict, namespace: str = "") -> None:
+    def set(self, content: bytes, result: dict, namespace: str = "", content_hash: Optional[str] = None) -> None:
         """Cache OCR result to both memory and disk."""
         try:
-            content_hash = self._hash_content(base64_data, namespace=namespace)
+            content_hash = content_hash or content_key(content, namespace)
 
             # Store in memory cache first (fast access for repeated requests)
             self._memory_cache.set(content_hash, result)
@@ -164,15 +167,15 @@ class OCRCache:
             tmp_file = cache_file.with_name(f"{cache_file.name}.{uuid.uuid4().hex}.tmp")
             tmp_file.write_text(payload, encoding="utf-8")
             os.replace(tmp_file, cache_file)
-            logger.info(f"Cached: {content_hash}")
+            logger.info("Cached: %s", content_hash)
         except Exception as e:
-            logger.warning(f"Cache write failed: {e}")
+            logger.warning("Cache write failed: %s", e)
 
     def clear(self) -> int:
         """Clear all cache files and memory cache. Returns count of deleted files."""
         # Clear memory cache
         memory_cleared = self._memory_cache.clear()
-        logger.debug(f"Cleared {memory_cleared} memory cache entries")
+        logger.debug("Cleared %d memory cache entries", memory_cleared)
 
         # Clear disk cache
         count = 0
@@ -38,10 +38,14 @@ class Settings:
     cache_enabled: bool = True
     cache_ttl_hours: int = 168  # 7 days
     cache_dir: Optional[str] = None
+    cache_memory_size: int = 50  # In-process LRU entries in front of disk cache
 
     # Image extraction settings
     image_min_size: int = 100  # Min dimension to include images
     max_concurrent: int = 5    # Max concurrent batch requests
+    max_retries: int = 2       # Retries for transient OCR API errors
+    rate_limit_rps: float = 0.0  # Max OCR API requests per second (0 = unlimited)
+    upload_threshold_mb: int = 0  # Upload documents >= this size via Files API (0 = always inline)
 
     # URL fetching settings
     url_timeout_seconds: int = 30
@@ -64,6 +68,15 @@ class Settings:
             except ValueError:
                 return default
 
+        def _get_float(var_name: str, default: float) -> float:
+            raw = os.getenv(var_name)
+            if raw is None or raw == "":
+                return default
+            try:
+                return float(raw)
+            except ValueError:
+                return default
+
         def _get_bool(var_name: str, default: bool) -> bool:
             raw = os.getenv(var_name)
             if raw is None or raw == "":
@@ -84,8 +97,12 @@ class Settings:
             cache_enabled=_get_bool("OCR_CACHE_ENABLED", True),
             cache_ttl_hours=_get_int("OCR_CACHE_TTL_HOURS", 168),
             cache_dir=os.getenv("OCR_CACHE_DIR"),
+            cache_memory_size=_get_int("OCR_CACHE_MEMORY_SIZE", 50),
             image_min_size=_get_int("OCR_IMAGE_MIN_SIZE", 100),
             max_concurrent=_get_int("OCR_MAX_CONCURRENT", 5),
+            max_retries=_get_int("OCR_MAX_RETRIES", 2),
+            rate_limit_rps=_get_float("OCR_RATE_LIMIT_RPS", 0.0),
+            upload_threshold_mb=_get_int("OCR_UPLOAD_THRESHOLD_MB", 0),
             url_timeout_seconds=_get_int("OCR_URL_TIMEOUT_SECONDS", 30),
             url_max_redirects=_get_int("OCR_URL_MAX_REDIRECTS", 3),
             url_allow_nonstandard_ports=_get_bool("OCR_URL_ALLOW_NONSTANDARD_PORTS", False),
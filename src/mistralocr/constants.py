@@ -25,27 +25,33 @@ MIME_TYPES = {
     '.tif': 'image/tiff',
 }
 
+# Reverse mapping (first listed extension wins, e.g. '.jpg' for image/jpeg)
+MIME_EXTENSIONS = {mime: ext for ext, mime in reversed(MIME_TYPES.items())}
+
 # Allowed MIME types for URL validation
 ALLOWED_MIME_TYPES: FrozenSet[str] = frozenset(MIME_TYPES.values())
 
 # Default limits
 DEFAULT_MAX_FILE_SIZE_MB = 50
 DEFAULT_MAX_FILE_SIZE_BYTES = DEFAULT_MAX_FILE_SIZE_MB * 1024 * 1024
+# Parallel local reads beyond this mostly add seek contention (URL downloads are not limited)
+MAX_CONCURRENT_FILE_READS = 4
 
 # Invalid filename characters
 INVALID_FILENAME_CHARS = '<>:"/\\|?*'
 
 
+# Extension -> file type, resolved with one dict lookup ('.pdf' overrides 'document')
+FILE_TYPES = {
+    **{ext: 'image' for ext in IMAGE_EXTENSIONS},
+    **{ext: 'document' for ext in DOCUMENT_EXTENSIONS},
+    '.pdf': 'pdf',
+}
+
+
 def get_file_type(extension: str) -> str | None:
     """Get file type from extension."""
-    ext = extension.lower()
-    if ext == '.pdf':
-        return 'pdf'
-    if ext in DOCUMENT_EXTENSIONS:
-        return 'document'
-    if ext in IMAGE_EXTENSIONS:
-        return 'image'
-    return None
+    return FILE_TYPES.get(extension.lower())
 
 
 def get_mime_type(extension: str) -> str:
@@ -2,6 +2,7 @@
 Abstract document source protocol for OCR processing.
 """
 
+import asyncio
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from enum import Enum
@@ -14,11 +15,11 @@ class DocumentSourceType(Enum):
     URL = "url"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ValidationResult:
-    """Immutable result of document validation and encoding."""
+    """Immutable result of document validation. data holds the raw document bytes (or download buffer)."""
     success: bool
-    data: Optional[str] = None
+    data: Optional[bytes] = None
     mime_type: Optional[str] = None
     size_bytes: Optional[int] = None
     error: Optional[str] = None
@@ -28,11 +29,11 @@ class ValidationResult:
         return cls(success=False, error=error)
 
     @classmethod
-    def ok(cls, data: str, mime_type: str, size_bytes: int) -> "ValidationResult":
+    def ok(cls, data: bytes, mime_type: str, size_bytes: int) -> "ValidationResult":
         return cls(success=True, data=data, mime_type=mime_type, size_bytes=size_bytes)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class DocumentDescriptor:
     """Immutable descriptor for a document to be processed."""
     source_type: DocumentSourceType
@@ -53,9 +54,17 @@ class DocumentSource(ABC):
 
     @abstractmethod
     def validate_and_encode(self, identifier: str) -> ValidationResult:
-        """Validate and encode document for OCR processing."""
+        """Validate document and load its raw bytes for OCR processing."""
         pass
 
+    async def validate_and_encode_async(self, identifier: str, executor=None) -> ValidationResult:
+        """Async variant of validate_and_encode; runs the sync method on executor by default."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, self.validate_and_encode, identifier)
+
+    def invalidate(self, identifier: str) -> None:
+        """Drop any locally remembered result for identifier (no-op by default)."""
+
     @abstractmethod
     def get_display_name(self, identifier: str) -> str:
         """Generate user-friendly display name."""
@@ -2,29 +2,38 @@
 Local file document source for OCR processing.
 """
 
-import base64
 import mimetypes
+import threading
 from pathlib import Path
 from typing import Optional
 
 from .document_source import DocumentSource, ValidationResult
 from .config import settings
-from .constants import ALLOWED_EXTENSIONS, DEFAULT_MAX_FILE_SIZE_BYTES, get_file_type, get_mime_type
+from .constants import (
+    ALLOWED_EXTENSIONS, DEFAULT_MAX_FILE_SIZE_BYTES, MAX_CONCURRENT_FILE_READS, MIME_TYPES,
+    get_file_type, get_mime_type,
+)
 from .utils import sanitize_filename
 
 
 class LocalFileSource(DocumentSource):
     """Handles local file documents with security validation."""
 
-    def __init__(self, max_file_size: Optional[int] = None, allow_symlinks: bool = False):
+    def __init__(
+        self,
+        max_file_size: Optional[int] = None,
+        allow_symlinks: bool = False,
+        max_concurrent_reads: int = MAX_CONCURRENT_FILE_READS,
+    ):
         self.max_file_size = max_file_size or (
             settings.max_file_size if settings else DEFAULT_MAX_FILE_SIZE_BYTES
         )
         self.allow_symlinks = allow_symlinks
         self._allowed = settings.allowed_extensions if settings else ALLOWED_EXTENSIONS
+        self._read_slots = threading.BoundedSemaphore(max(max_concurrent_reads, 1))
 
     def validate_and_encode(self, file_path: str) -> ValidationResult:
-        """Validate file and encode to base64."""
+        """Validate file and read its bytes."""
         try:
             path = Path(file_path).resolve()
 
@@ -53,10 +62,11 @@ class LocalFileSource(DocumentSource):
             if size == 0:
                 return ValidationResult.failure(f'File is empty: {file_path}')
 
-            with open(path, 'rb') as f:
-                data = base64.b64encode(f.read()).decode('utf-8')
+            with self._read_slots, open(path, 'rb') as f:
+                data = f.read()
 
-            mime = mimetypes.guess_type(str(path))[0] or get_mime_type(ext)
+            # Bundled table first; mimetypes (which loads system MIME databases) only for unknowns
+            mime = MIME_TYPES.get(ext) or mimetypes.guess_type(str(path))[0] or get_mime_type(ext)
             return ValidationResult.ok(data, mime, size)
 
         except PermissionError:
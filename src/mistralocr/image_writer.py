@@ -2,18 +2,17 @@
 Utilities for saving extracted images to disk.
 """
 
-import base64
 import logging
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Iterable, Optional
 
-from .utils import sanitize_filename
+from .utils import b64decode, sanitize_filename
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ImageWriteSummary:
     written: int
     skipped: int
@@ -25,7 +24,29 @@ class ImageWriter:
     def __init__(self, assets_dir: Path, link_base_dir: Optional[Path] = None):
         self.assets_dir = assets_dir.resolve()
         self.link_base_dir = link_base_dir.resolve() if link_base_dir else None
-        self.assets_dir.mkdir(parents=True, exist_ok=True)
+        self._taken: Optional[set[str]] = None
+
+    def _prepare_dir(self) -> set[str]:
+        """Create the assets dir on first write; documents without images never touch the disk."""
+        try:
+            self.assets_dir.mkdir(parents=True)
+            return set()
+        except FileExistsError:
+            # One directory listing up front instead of an exists() stat per image
+            return {p.name for p in self.assets_dir.iterdir()}
+
+    def _unique_path(self, filename: str) -> Path:
+        if self._taken is None:
+            self._taken = self._prepare_dir()
+        out_path = self.assets_dir / filename
+        if filename in self._taken:
+            stem, suffix = out_path.stem, out_path.suffix
+            counter = 1
+            while out_path.name in self._taken:
+                out_path = self.assets_dir / f"{stem}_{counter:02d}{suffix}"
+                counter += 1
+        self._taken.add(out_path.name)
+        return out_path
 
     def write_images(self, images: Iterable[dict]) -> tuple[list[dict], ImageWriteSummary]:
         written = 0
@@ -45,15 +66,9 @@ class ImageWriter:
             if not Path(filename).suffix:
                 filename = f"{filename}.bin"
 
-            out_path = self.assets_dir / filename
             try:
-                if out_path.exists():
-                    stem, suffix = out_path.stem, out_path.suffix
-                    counter = 1
-                    while out_path.exists():
-                        out_path = self.assets_dir / f"{stem}_{counter:02d}{suffix}"
-                        counter += 1
-                out_path.write_bytes(base64.b64decode(img_b64))
+                out_path = self._unique_path(filename)
+                out_path.write_bytes(b64decode(img_b64))
                 written += 1
                 image_path = str(out_path)
                 if self.link_base_dir:
@@ -64,7 +79,7 @@ class ImageWriter:
                 updated.append({**img, "image_path": image_path})
             except Exception as e:
                 failed += 1
-                logger.warning(f"Failed to write image {img_id}: {e}")
+                logger.warning("Failed to write image %s: %s", img_id, e)
                 updated.append(img)
 
         return updated, ImageWriteSummary(written, skipped, failed, str(self.assets_dir))
@@ -6,16 +6,22 @@ import logging
 import uuid
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 from dataclasses import dataclass
-from urllib.parse import urlparse
 
-from .utils import extract_filename_from_url, sanitize_filename
+from .utils import extract_filename_from_url, sanitize_filename, url_path
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass(frozen=True)
+def _field(item: Any, name: str, default: Any = None) -> Any:
+    """Read a field from a dict or an attribute-style model (e.g. OCRPage/OCRImage)."""
+    if isinstance(item, dict):
+        return item.get(name, default)
+    return getattr(item, name, default)
+
+
+@dataclass(frozen=True, slots=True)
 class MarkdownWriteResult:
     """Result of markdown write operation."""
     success: bool
@@ -36,7 +42,10 @@ class MarkdownWriter:
         base_filename: Optional[str] = None,
         output_path: Optional[str] = None,
     ) -> MarkdownWriteResult:
-        """Write single OCR result to markdown."""
+        """Write single OCR result to markdown.
+
+        Pages and images may be plain dicts or OCRPage/OCRImage models.
+        """
         try:
             required = ['file_path', 'file_type', 'model', 'pages', 'images']
             if missing := [f for f in required if f not in ocr_result]:
@@ -91,7 +100,7 @@ class MarkdownWriter:
 
         # Header
         if source.startswith(('http://', 'https://')):
-            doc_name = Path(urlparse(source).path).name or "document"
+            doc_name = Path(url_path(source)).name or "document"
         else:
             doc_name = Path(source).name
 
@@ -116,16 +125,16 @@ class MarkdownWriter:
         # TOC
         if len(pages) > 1:
             lines.extend(["## Table of Contents", ""])
-            lines.extend(f"- [Page {p.get('index', 0) + 1}](#page-{p.get('index', 0) + 1})" for p in pages)
+            lines.extend(f"- [Page {_field(p, 'index', 0) + 1}](#page-{_field(p, 'index', 0) + 1})" for p in pages)
             if images:
                 lines.append("- [Extracted Figures & Images](#extracted-figures--images)")
             lines.append("")
 
         # Pages
         for page in pages:
-            idx = page.get('index', 0)
+            idx = _field(page, 'index', 0)
             lines.extend([f"## Page {idx + 1}", ""])
-            if dims := page.get('dimensions'):
+            if dims := _field(page, 'dimensions'):
                 lines.extend([
                     "*Metadata:*",
                     f"- Width: {dims.get('width', 'N/A')}",
@@ -134,12 +143,12 @@ class MarkdownWriter:
                 ])
 
             # Note images on this page
-            page_images = page.get('images', [])
+            page_images = _field(page, 'images', [])
             if page_images:
                 lines.append(f"*Images on this page: {len(page_images)}*")
                 lines.append("")
 
-            lines.extend([page.get('markdown', ''), ""])
+            lines.extend([_field(page, 'markdown', ''), ""])
 
         # Images/Figures section
         if images:
@@ -153,7 +162,7 @@ class MarkdownWriter:
             # Group by page
             images_by_page: Dict[int, List] = {}
             for img in images:
-                page_idx = img.get('page_index', 0)
+                page_idx = _field(img, 'page_index', 0)
                 if page_idx not in images_by_page:
                     images_by_page[page_idx] = []
                 images_by_page[page_idx].append(img)
@@ -163,12 +172,12 @@ class MarkdownWriter:
                 lines.extend([f"### Page {page_idx + 1} Images", ""])
 
                 for img in page_imgs:
-                    img_id = img.get('id', 'unknown')
-                    width = img.get('width', 0)
-                    height = img.get('height', 0)
-                    x1, y1 = img.get('top_left_x', 0), img.get('top_left_y', 0)
-                    x2, y2 = img.get('bottom_right_x', 0), img.get('bottom_right_y', 0)
-                    image_path = img.get('image_path')
+                    img_id = _field(img, 'id', 'unknown')
+                    width = _field(img, 'width', 0)
+                    height = _field(img, 'height', 0)
+                    x1, y1 = _field(img, 'top_left_x', 0), _field(img, 'top_left_y', 0)
+                    x2, y2 = _field(img, 'bottom_right_x', 0), _field(img, 'bottom_right_y', 0)
+                    image_path = _field(img, 'image_path')
 
                     lines.extend([
                         f"#### {img_id}", "",
@@ -180,8 +189,8 @@ class MarkdownWriter:
                         lines.append(f"- **File**: {image_path}")
 
                     # If base64 data available, note it
-                    if img.get('image_base64'):
-                        lines.append(f"- **Data**: Base64 encoded ({len(img['image_base64'])} chars)")
+                    if image_base64 := _field(img, 'image_base64'):
+                        lines.append(f"- **Data**: Base64 encoded ({len(image_base64)} chars)")
 
                     if image_path:
                         lines.extend(["", f"![{img_id}]({image_path})"])
@@ -3,11 +3,13 @@ Pydantic models for OCR API responses.
 """
 
 from typing import List, Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class OCRImage(BaseModel):
     """Extracted image/figure/chart from document."""
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
     id: str = Field(description="Image identifier (e.g., img-0.jpeg)")
     page_index: int = Field(default=0, description="Page where image appears")
     top_left_x: int = Field(description="Top-left X coordinate")
@@ -22,6 +24,8 @@ class OCRImage(BaseModel):
 
 class OCRPage(BaseModel):
     """Single OCR page result."""
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
     index: int = Field(description="Page number (0-indexed)")
     markdown: str = Field(description="Extracted text in markdown format")
     dimensions: Optional[dict] = Field(default=None, description="Page dimensions")
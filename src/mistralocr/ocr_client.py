@@ -4,17 +4,67 @@ Mistral OCR API client wrapper with connection pooling and async support.
 
 import asyncio
 import logging
+import mimetypes
 import random
 import time
+from functools import lru_cache
+from itertools import islice
 from typing import Any, Optional
 
+import httpx
 from mistralai import Mistral
 from mistralai.models import OCRResponse
 
-from .cache import OCRCache
+from .cache import OCRCache, content_key
+from .constants import MIME_EXTENSIONS
+from .rate_limiter import RateLimiter
+from .utils import HTTP2_ENABLED, b64encode_str, token_pattern
 
 logger = logging.getLogger(__name__)
 
+# Responses with more pages than this are parsed off the event loop
+ASYNC_PARSE_THREAD_THRESHOLD_PAGES = 20
+# Documents at least this large are base64-encoded off the event loop
+ASYNC_ENCODE_THREAD_THRESHOLD_BYTES = 1 << 20
+
+# Connection pool shared by all requests made through one client
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=50, keepalive_expiry=30.0)
+HTTP_TIMEOUT = httpx.Timeout(300.0, connect=10.0)
+
+
+_RETRYABLE_PATTERN = token_pattern(
+    "timeout", "timed out", "429", "rate limit", "quota", "temporarily",
+    "500", "502", "503", "504", "internal server error", "bad gateway",
+    "service unavailable", "gateway timeout",
+)
+# Message-based fallback, checked in order, for errors without a usable status code
+_ERROR_TYPE_PATTERNS = (
+    ("AuthenticationError", token_pattern("authentication", "unauthorized", "401")),
+    ("QuotaExceededError", token_pattern("quota", "rate limit", "429", "limit")),
+    ("TimeoutError", token_pattern("timeout", "timed out")),
+)
+
+# Status codes carried by SDK errors (mistralai SDKError/HTTPValidationError expose status_code)
+_RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+_STATUS_ERROR_TYPES = {
+    401: "AuthenticationError",
+    403: "AuthenticationError",
+    408: "TimeoutError",
+    429: "QuotaExceededError",
+    504: "TimeoutError",
+}
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    code = getattr(error, "status_code", None)
+    return code if isinstance(code, int) else None
+
+
+@lru_cache(maxsize=256)
+def _build_cache_namespace(model: str, mime_type: str, image_min_size: int, image_limit: Optional[int]) -> str:
+    limit_part = "all" if image_limit is None else str(image_limit)
+    return f"v4|model={model}|mime={mime_type}|image_min_size={image_min_size}|image_limit={limit_part}"
+
 
 class MistralOCRClient:
     """Client for Mistral's OCR API with caching and connection pooling."""
@@ -27,50 +77,90 @@ class MistralOCRClient:
         api_base: Optional[str] = None,
         max_retries: int = 2,
         retry_backoff_seconds: float = 0.5,
+        retry_max_delay_seconds: float = 8.0,
+        rate_limiter: Optional[RateLimiter] = None,
+        upload_threshold_bytes: int = 0,
     ):
         self._api_key = api_key
         self._api_base = api_base
-        self.client = self._create_client(api_key=api_key, api_base=api_base)
+        self._client: Optional[Mistral] = None
+        self._http: Optional[httpx.Client] = None
+        self._async_client: Optional[Mistral] = None
+        self._async_http: Optional[httpx.AsyncClient] = None
         self.model = model
         self.cache = cache
         self.max_retries = max_retries
         self.retry_backoff_seconds = retry_backoff_seconds
+        self.retry_max_delay_seconds = retry_max_delay_seconds
+        self.rate_limiter = rate_limiter
+        # Documents at least this large are uploaded via the Files API instead of inlined (0 = never)
+        self.upload_threshold_bytes = upload_threshold_bytes
+        # Identical concurrent async requests share one API call (single-flight)
+        self._inflight: dict[tuple, asyncio.Future] = {}
 
     @staticmethod
-    def _create_client(api_key: str, api_base: Optional[str]) -> Mistral:
-        if not api_base:
-            return Mistral(api_key=api_key)
+    def _create_client(api_key: str, api_base: Optional[str], **http_clients: Any) -> tuple[Mistral, bool]:
+        """Create SDK client, dropping options the installed mistralai version doesn't accept.
+
+        Returns the client and whether it took the given http clients (callers own them otherwise).
+        """
+        base = {"server_url": api_base} if api_base else {}
         try:
-            return Mistral(api_key=api_key, server_url=api_base)
+            return Mistral(api_key=api_key, **base, **http_clients), True
         except TypeError:
-            return Mistral(api_key=api_key)
+            pass
+        try:
+            return Mistral(api_key=api_key, **base), False
+        except TypeError:
+            return Mistral(api_key=api_key), False
+
+    @property
+    def client(self) -> Mistral:
+        """Lazily created SDK client for the sync path (uploads, process_document)."""
+        if self._client is None:
+            http = httpx.Client(http2=HTTP2_ENABLED, limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+            self._client, used = self._create_client(self._api_key, self._api_base, client=http)
+            if used:
+                self._http = http
+            else:
+                http.close()
+        return self._client
+
+    @property
+    def async_client(self) -> Mistral:
+        """Lazily created SDK client whose pooled async connections are reused across calls."""
+        if self._async_client is None:
+            http = httpx.AsyncClient(http2=HTTP2_ENABLED, limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+            self._async_client, used = self._create_client(self._api_key, self._api_base, async_client=http)
+            # An unused AsyncClient never opened a connection, so there is nothing to close
+            self._async_http = http if used else None
+        return self._async_client
+
+    async def aclose(self) -> None:
+        """Close pooled sync and async connections."""
+        if self._http is not None:
+            self._http.close()
+        if self._async_http is not None:
+            await self._async_http.aclose()
+        self._http = None
+        self._client = None
+        self._async_http = None
+        self._async_client = None
 
     def _cache_namespace(self, mime_type: str, image_min_size: int, image_limit: Optional[int]) -> str:
-        limit_part = "all" if image_limit is None else str(image_limit)
-        return f"v3|model={self.model}|mime={mime_type}|image_min_size={image_min_size}|image_limit={limit_part}"
+        return _build_cache_namespace(self.model, mime_type, image_min_size, image_limit)
 
     def _is_retryable(self, error: Exception) -> bool:
-        msg = str(error).lower()
-        return any(
-            token in msg
-            for token in (
-                "timeout",
-                "timed out",
-                "429",
-                "rate limit",
-                "quota",
-                "temporarily",
-                "503",
-                "502",
-                "bad gateway",
-                "service unavailable",
-                "gateway timeout",
-            )
-        )
+        if isinstance(error, httpx.TimeoutException):
+            return True
+        code = _status_code(error)
+        if code is not None:
+            return code in _RETRYABLE_STATUS_CODES
+        return _RETRYABLE_PATTERN.search(str(error)) is not None
 
     def process_document(
         self,
-        base64_data: str,
+        data: bytes,
         mime_type: str,
         include_images: bool = False,
         save_images: bool = False,
@@ -82,90 +172,186 @@ class MistralOCRClient:
         Process document with OCR.
 
         Args:
-            base64_data: Base64 encoded document
+            data: Raw document bytes
             mime_type: MIME type of document
             include_images: Include base64 image data in response
-            image_limit: Max images to include (None = all)
+            image_limit: Max images to include (None = all, 0 = none)
             image_min_size: Min width/height to include image (filters tiny icons)
 
         Returns:
             Dict with success, pages, images, model, usage, error
         """
-        cache_allowed = self.cache is not None and not include_images and not save_images and not bypass_cache
-        if cache_allowed:
-            cached = self.cache.get(
-                base64_data,
-                namespace=self._cache_namespace(mime_type, image_min_size, image_limit),
-            )
-            if isinstance(cached, dict) and cached.get("success") is True:
-                cached["_from_cache"] = True
-                return cached
+        cache_namespace, cached = self._lookup_cache(
+            data, mime_type, include_images or save_images or bypass_cache, image_limit, image_min_size
+        )
+        if cached is not None:
+            return cached
 
+        uploaded_file_id: Optional[str] = None
         try:
-            data_uri = f"data:{mime_type};base64,{base64_data}"
-            if mime_type.startswith("image/"):
-                document = {"type": "image_url", "image_url": {"url": data_uri}}
+            if self._should_upload(data, mime_type):
+                document, uploaded_file_id = self._upload_document(data, mime_type)
             else:
-                document = {"type": "document_url", "document_url": data_uri}
-
-            response: Optional[OCRResponse] = None
-            last_error: Optional[Exception] = None
-            for attempt in range(self.max_retries + 1):
-                try:
-                    response = self.client.ocr.process(
-                        model=self.model,
-                        document=document,
-                        include_image_base64=bool(include_images or save_images),
-                    )
-                    break
-                except Exception as e:
-                    last_error = e
-                    if attempt >= self.max_retries or not self._is_retryable(e):
-                        raise
-                    # Exponential backoff with jitter to prevent thundering herd
-                    base_delay = self.retry_backoff_seconds * (2**attempt)
-                    jitter = random.uniform(0, base_delay * 0.1)
-                    time.sleep(base_delay + jitter)
-
-            if response is None:
-                raise RuntimeError(f"OCR request failed: {last_error}")
-
-            # Process response using shared helper
-            return self._process_response(
-                response, include_images, save_images, image_limit, image_min_size,
-                cache_allowed, base64_data, mime_type
-            )
+                document = self._build_document(data, mime_type)
+            response = self._call_with_retry(document, bool(include_images or save_images))
+        except Exception as e:
+            return self._error_result(e, "OCR request failed")
+        finally:
+            if uploaded_file_id:
+                self._delete_upload(uploaded_file_id)
+
+        return self._process_response(
+            response, include_images, save_images, image_limit, image_min_size,
+            data, cache_namespace
+        )
 
+    def _lookup_cache(
+        self,
+        data: bytes,
+        mime_type: str,
+        skip_cache: bool,
+        image_limit: Optional[int],
+        image_min_size: int,
+        content_hash: Optional[str] = None,
+    ) -> tuple[Optional[str], Optional[dict[str, Any]]]:
+        """Return (cache_namespace, cached_result). Namespace is None when caching doesn't apply.
+
+        content_hash is the precomputed content_key for this namespace, if the caller has one.
+        """
+        if self.cache is None or skip_cache:
+            return None, None
+        cache_namespace = self._cache_namespace(mime_type, image_min_size, image_limit)
+        cached = self.cache.get(data, namespace=cache_namespace, content_hash=content_hash)
+        if isinstance(cached, dict) and cached.get("success") is True:
+            cached["_from_cache"] = True
+            return cache_namespace, cached
+        return cache_namespace, None
+
+    @staticmethod
+    def _build_document(data: bytes, mime_type: str) -> dict[str, Any]:
+        # The only place the payload is base64-encoded: the inline data URI sent to the API
+        data_uri = f"data:{mime_type};base64,{b64encode_str(data)}"
+        if mime_type.startswith("image/"):
+            return {"type": "image_url", "image_url": {"url": data_uri}}
+        return {"type": "document_url", "document_url": data_uri}
+
+    def _should_upload(self, data: bytes, mime_type: str) -> bool:
+        """Large non-image documents skip the inline data URI (a second full copy of the payload)."""
+        if self.upload_threshold_bytes <= 0 or mime_type.startswith("image/"):
+            return False
+        return len(data) >= self.upload_threshold_bytes
+
+    @staticmethod
+    def _upload_file_payload(data: bytes, mime_type: str) -> dict[str, Any]:
+        extension = MIME_EXTENSIONS.get(mime_type) or mimetypes.guess_extension(mime_type) or ""
+        return {"file_name": f"document{extension}", "content": data}
+
+    def _upload_document(self, data: bytes, mime_type: str) -> tuple[dict[str, Any], str]:
+        """Upload document and return (signed-URL document payload, uploaded file id)."""
+        uploaded = self.client.files.upload(file=self._upload_file_payload(data, mime_type), purpose="ocr")
+        try:
+            signed = self.client.files.get_signed_url(file_id=uploaded.id)
+        except Exception:
+            self._delete_upload(uploaded.id)
+            raise
+        return {"type": "document_url", "document_url": signed.url}, uploaded.id
+
+    async def _upload_document_async(self, data: bytes, mime_type: str) -> tuple[dict[str, Any], str]:
+        """Async variant of _upload_document."""
+        async_client = self.async_client
+        uploaded = await async_client.files.upload_async(
+            file=self._upload_file_payload(data, mime_type), purpose="ocr"
+        )
+        try:
+            signed = await async_client.files.get_signed_url_async(file_id=uploaded.id)
+        except Exception:
+            await self._delete_upload_async(uploaded.id)
+            raise
+        return {"type": "document_url", "document_url": signed.url}, uploaded.id
+
+    def _delete_upload(self, file_id: str) -> None:
+        try:
+            self.client.files.delete(file_id=file_id)
         except Exception as e:
-            error_type = self._classify_error(e)
-            logger.warning("OCR request failed (%s): %s", error_type, e)
-
-            return {
-                "success": False,
-                "pages": [],
-                "images": [],
-                "total_images": 0,
-                "model": self.model,
-                "usage": {},
-                "error": f"{error_type}: {e}",
-                "error_type": error_type,
-                "_from_cache": False,
-            }
+            logger.warning("Failed to delete uploaded file %s: %s", file_id, e)
+
+    async def _delete_upload_async(self, file_id: str) -> None:
+        try:
+            await self.async_client.files.delete_async(file_id=file_id)
+        except Exception as e:
+            logger.warning("Failed to delete uploaded file %s: %s", file_id, e)
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """Capped exponential backoff with jitter to prevent thundering herd."""
+        base_delay = min(self.retry_max_delay_seconds, self.retry_backoff_seconds * (2**attempt))
+        return base_delay + random.uniform(0, base_delay * 0.1)
+
+    def _call_with_retry(self, document: dict[str, Any], include_image_base64: bool) -> OCRResponse:
+        """Call the OCR endpoint, retrying transient failures. Raises the last error."""
+        for attempt in range(self.max_retries + 1):
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+            try:
+                return self.client.ocr.process(
+                    model=self.model,
+                    document=document,
+                    include_image_base64=include_image_base64,
+                )
+            except Exception as e:
+                if attempt >= self.max_retries or not self._is_retryable(e):
+                    raise
+                time.sleep(self._backoff_delay(attempt))
+        raise RuntimeError("OCR request failed: no attempts made")
+
+    async def _call_with_retry_async(self, document: dict[str, Any], include_image_base64: bool) -> OCRResponse:
+        """Async variant of _call_with_retry that doesn't block the event loop."""
+        async_client = self.async_client
+        for attempt in range(self.max_retries + 1):
+            if self.rate_limiter:
+                await self.rate_limiter.acquire_async()
+            try:
+                return await async_client.ocr.process_async(
+                    model=self.model,
+                    document=document,
+                    include_image_base64=include_image_base64,
+                )
+            except Exception as e:
+                if attempt >= self.max_retries or not self._is_retryable(e):
+                    raise
+                await asyncio.sleep(self._backoff_delay(attempt))
+        raise RuntimeError("OCR request failed: no attempts made")
+
+    def _error_result(self, error: Exception, context: str) -> dict[str, Any]:
+        error_type = self._classify_error(error)
+        logger.warning("%s (%s): %s", context, error_type, error)
+        return {
+            "success": False,
+            "pages": [],
+            "images": [],
+            "total_images": 0,
+            "model": self.model,
+            "usage": {},
+            "error": f"{error_type}: {error}",
+            "error_type": error_type,
+            "_from_cache": False,
+        }
 
     @staticmethod
     def _classify_error(error: Exception) -> str:
-        msg = str(error).lower()
-        if any(token in msg for token in ("authentication", "unauthorized", "401")):
-            return "AuthenticationError"
-        if any(token in msg for token in ("quota", "rate limit", "429", "limit")):
-            return "QuotaExceededError"
-        if "timeout" in msg or "timed out" in msg:
+        if isinstance(error, httpx.TimeoutException):
             return "TimeoutError"
+        error_type = _STATUS_ERROR_TYPES.get(_status_code(error))
+        if error_type:
+            return error_type
+        msg = str(error)
+        for error_type, pattern in _ERROR_TYPE_PATTERNS:
+            if pattern.search(msg):
+                return error_type
         return "APIError"
 
     async def process_document_async(
         self,
-        base64_data: str,
+        data: bytes,
         mime_type: str,
         include_images: bool = False,
         save_images: bool = False,
@@ -180,80 +366,113 @@ class MistralOCRClient:
         Use this when processing multiple documents concurrently for better performance.
 
         Args:
-            base64_data: Base64 encoded document
+            data: Raw document bytes
             mime_type: MIME type of document
             include_images: Include base64 image data in response
             save_images: Whether images will be saved (affects caching)
             bypass_cache: Skip cache lookup/storage
-            image_limit: Max images to include (None = all)
+            image_limit: Max images to include (None = all, 0 = none)
             image_min_size: Min width/height to include image (filters tiny icons)
 
         Returns:
             Dict with success, pages, images, model, usage, error
         """
-        cache_allowed = self.cache is not None and not include_images and not save_images and not bypass_cache
-        if cache_allowed:
-            cached = self.cache.get(
-                base64_data,
-                namespace=self._cache_namespace(mime_type, image_min_size, image_limit),
+        if bypass_cache:
+            # A forced refresh must not be answered by another caller's in-flight request
+            return await self._process_document_async(
+                data, mime_type, include_images, save_images, bypass_cache, image_limit, image_min_size
             )
-            if isinstance(cached, dict) and cached.get("success") is True:
-                cached["_from_cache"] = True
-                return cached
 
+        namespace = self._cache_namespace(mime_type, image_min_size, image_limit)
+        if self.cache is None:
+            # Without a cache only the very same payload object is coalesced (e.g. a reused
+            # URL download); the leader keeps data alive, so its id can't be recycled mid-flight
+            content_hash = None
+            flight_key = (id(data), namespace, include_images, save_images)
+        else:
+            # The cache digest doubles as the in-flight key, so each payload is hashed once
+            content_hash = await asyncio.to_thread(content_key, data, namespace)
+            flight_key = (content_hash, include_images, save_images)
+        while (pending := self._inflight.get(flight_key)) is not None:
+            try:
+                # Callers pop keys off the returned dict, so each one gets its own copy
+                return dict(await asyncio.shield(pending))
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # The leading request was cancelled; retry (or lead) ourselves
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[flight_key] = future
         try:
-            data_uri = f"data:{mime_type};base64,{base64_data}"
-            if mime_type.startswith("image/"):
-                document = {"type": "image_url", "image_url": {"url": data_uri}}
-            else:
-                document = {"type": "document_url", "document_url": data_uri}
-
-            response: Optional[OCRResponse] = None
-            last_error: Optional[Exception] = None
-
-            # Use async API - create client once outside retry loop
-            async with Mistral(api_key=self._api_key, server_url=self._api_base) as async_client:
-                for attempt in range(self.max_retries + 1):
-                    try:
-                        response = await async_client.ocr.process_async(
-                            model=self.model,
-                            document=document,
-                            include_image_base64=bool(include_images or save_images),
-                        )
-                        break
-                    except Exception as e:
-                        last_error = e
-                        if attempt >= self.max_retries or not self._is_retryable(e):
-                            raise
-                        # Async sleep with exponential backoff and jitter
-                        base_delay = self.retry_backoff_seconds * (2**attempt)
-                        jitter = random.uniform(0, base_delay * 0.1)
-                        await asyncio.sleep(base_delay + jitter)
-
-            if response is None:
-                raise RuntimeError(f"OCR request failed: {last_error}")
-
-            # Process response (same logic as sync version)
-            return self._process_response(
-                response, include_images, save_images, image_limit, image_min_size,
-                cache_allowed, base64_data, mime_type
+            result = await self._process_document_async(
+                data, mime_type, include_images, save_images, bypass_cache, image_limit, image_min_size,
+                content_hash,
             )
+        except BaseException:
+            future.cancel()
+            raise
+        else:
+            future.set_result(result)
+            return dict(result)
+        finally:
+            del self._inflight[flight_key]
+
+    async def _process_document_async(
+        self,
+        data: bytes,
+        mime_type: str,
+        include_images: bool,
+        save_images: bool,
+        bypass_cache: bool,
+        image_limit: Optional[int],
+        image_min_size: int,
+        content_hash: Optional[str] = None,
+    ) -> dict[str, Any]:
+        # Hashing multi-MB payloads and reading the disk cache would otherwise stall the event loop
+        cache_namespace, cached = await asyncio.to_thread(
+            self._lookup_cache,
+            data, mime_type, include_images or save_images or bypass_cache, image_limit, image_min_size,
+            content_hash,
+        )
+        if cached is not None:
+            return cached
 
+        uploaded_file_id: Optional[str] = None
+        try:
+            if self._should_upload(data, mime_type):
+                document, uploaded_file_id = await self._upload_document_async(data, mime_type)
+            elif len(data) >= ASYNC_ENCODE_THREAD_THRESHOLD_BYTES:
+                document = await asyncio.to_thread(self._build_document, data, mime_type)
+            else:
+                document = self._build_document(data, mime_type)
+            response = await self._call_with_retry_async(document, bool(include_images or save_images))
         except Exception as e:
-            error_type = self._classify_error(e)
-            logger.warning("Async OCR request failed (%s): %s", error_type, e)
-
-            return {
-                "success": False,
-                "pages": [],
-                "images": [],
-                "total_images": 0,
-                "model": self.model,
-                "usage": {},
-                "error": f"{error_type}: {e}",
-                "error_type": error_type,
-                "_from_cache": False,
-            }
+            return self._error_result(e, "Async OCR request failed")
+        finally:
+            if uploaded_file_id:
+                await self._delete_upload_async(uploaded_file_id)
+
+        args = (
+            response, include_images, save_images, image_limit, image_min_size,
+            data, cache_namespace, content_hash,
+        )
+        # Large responses take long enough to parse (and cache) that they would stall other coroutines
+        if len(response.pages) > ASYNC_PARSE_THREAD_THRESHOLD_PAGES:
+            return await asyncio.to_thread(self._process_response, *args)
+        return self._process_response(*args)
+
+    @staticmethod
+    def _iter_sized_images(page_images, image_min_size: int):
+        """Yield (img, x1, y1, x2, y2, width, height) for images at least image_min_size on both sides."""
+        for img in page_images:
+            # Read each SDK model field once; these are hit per image on large documents
+            x1, y1 = img.top_left_x, img.top_left_y
+            x2, y2 = img.bottom_right_x, img.bottom_right_y
+            width = abs(x2 - x1)
+            height = abs(y2 - y1)
+            if width >= image_min_size and height >= image_min_size:
+                yield img, x1, y1, x2, y2, width, height
 
     def _process_response(
         self,
@@ -262,60 +481,61 @@ class MistralOCRClient:
         save_images: bool,
         image_limit: Optional[int],
         image_min_size: int,
-        cache_allowed: bool,
-        base64_data: str,
-        mime_type: str,
+        data: bytes,
+        cache_namespace: Optional[str],
+        content_hash: Optional[str] = None,
     ) -> dict[str, Any]:
-        """Process OCR response into result dict. Shared by sync and async methods."""
+        """Process OCR response into result dict. Shared by sync and async methods.
+
+        The result is written to cache when cache_namespace is provided.
+        """
         pages, images = [], []
         image_count = 0
+        want_base64 = include_images or save_images
 
         for page in response.pages:
+            page_index = page.index
+            page_image_ids: list[str] = []
             page_data = {
-                "index": page.index,
+                "index": page_index,
                 "markdown": page.markdown,
                 "dimensions": None,
-                "images": [],
+                "images": page_image_ids,
             }
 
-            if hasattr(page, "dimensions") and page.dimensions:
+            dims = getattr(page, "dimensions", None)
+            if dims:
                 page_data["dimensions"] = {
-                    "width": page.dimensions.width,
-                    "height": page.dimensions.height,
-                    "dpi": getattr(page.dimensions, "dpi", None),
+                    "width": dims.width,
+                    "height": dims.height,
+                    "dpi": getattr(dims, "dpi", None),
                 }
 
-            if hasattr(page, "images") and page.images:
-                for img in page.images:
-                    width = abs(img.bottom_right_x - img.top_left_x)
-                    height = abs(img.bottom_right_y - img.top_left_y)
-
-                    if width < image_min_size or height < image_min_size:
-                        continue
-
-                    if image_limit and image_count >= image_limit:
-                        continue
-
-                    img_data = {
-                        "id": img.id,
-                        "page_index": page.index,
-                        "top_left_x": img.top_left_x,
-                        "top_left_y": img.top_left_y,
-                        "bottom_right_x": img.bottom_right_x,
-                        "bottom_right_y": img.bottom_right_y,
-                        "width": width,
-                        "height": height,
-                        "image_base64": None,
-                    }
-
-                    if (include_images or save_images) and hasattr(img, "image_base64") and img.image_base64:
-                        img_data["image_base64"] = img.image_base64
+            pages.append(page_data)
 
-                    images.append(img_data)
-                    page_data["images"].append(img_data["id"])
-                    image_count += 1
+            # image_limit=0 means no images at all, so the per-image loop is skipped entirely
+            if image_limit is not None and image_count >= image_limit:
+                continue
+
+            remaining = image_limit - image_count if image_limit is not None else None
+            sized = self._iter_sized_images(getattr(page, "images", None) or (), image_min_size)
+            for img, x1, y1, x2, y2, width, height in islice(sized, remaining):
+                img_id = img.id
+                img_data = {
+                    "id": img_id,
+                    "page_index": page_index,
+                    "top_left_x": x1,
+                    "top_left_y": y1,
+                    "bottom_right_x": x2,
+                    "bottom_right_y": y2,
+                    "width": width,
+                    "height": height,
+                    "image_base64": getattr(img, "image_base64", None) if want_base64 else None,
+                }
 
-            pages.append(page_data)
+                images.append(img_data)
+                page_image_ids.append(img_id)
+                image_count += 1
 
         result = {
             "success": True,
@@ -332,14 +552,7 @@ class MistralOCRClient:
             "_from_cache": False,
         }
 
-        if cache_allowed:
-            cache_result = {**result}
-            for img in cache_result["images"]:
-                img["image_base64"] = None
-            self.cache.set(
-                base64_data,
-                cache_result,
-                namespace=self._cache_namespace(mime_type, image_min_size, image_limit),
-            )
+        if cache_namespace is not None:
+            self.cache.set(data, result, namespace=cache_namespace, content_hash=content_hash)
 
         return result
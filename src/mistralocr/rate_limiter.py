@@ -0,0 +1,46 @@
+"""
+Request pacing for Mistral OCR API calls.
+"""
+
+import asyncio
+import threading
+import time
+
+
+class RateLimiter:
+    """Thread-safe limiter enforcing a minimum interval between requests.
+
+    Each caller reserves the next free time slot under a short lock and then
+    sleeps outside it, so waiting callers never block each other's reservations.
+    Usable from worker threads (acquire) and coroutines (acquire_async).
+    """
+
+    def __init__(self, requests_per_second: float):
+        if requests_per_second <= 0:
+            raise ValueError(f"requests_per_second must be positive: {requests_per_second}")
+        self._interval = 1.0 / requests_per_second
+        self._next_ts = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def interval(self) -> float:
+        """Return minimum seconds between requests."""
+        return self._interval
+
+    def _reserve(self) -> float:
+        """Reserve the next slot and return how long to wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_ts)
+            self._next_ts = slot + self._interval
+            return slot - now
+
+    def acquire(self) -> None:
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self) -> None:
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
@@ -2,12 +2,17 @@
 Factory for creating document source handlers.
 """
 
+import atexit
+import re
 from typing import Optional
 
 from .document_source import DocumentSource, DocumentDescriptor, DocumentSourceType
 from .file_source import LocalFileSource
 from .url_source import URLSource
 
+_URL_PREFIXES = ('http://', 'https://')
+_URL_PREFIX_RE = re.compile(r'https?://', re.IGNORECASE)
+
 
 class DocumentSourceFactory:
     """Factory for creating document source handlers."""
@@ -43,7 +48,9 @@ class DocumentSourceFactory:
 
     def create_descriptor_auto(self, source: str) -> DocumentDescriptor:
         """Auto-detect source type from string."""
-        if source.lower().startswith(('http://', 'https://')):
+        # Common lowercase schemes hit the C-level tuple check; the bounded regex
+        # only runs for mixed-case schemes and never scans long paths
+        if source.startswith(_URL_PREFIXES) or _URL_PREFIX_RE.match(source, 0, 8):
             return DocumentDescriptor(
                 DocumentSourceType.URL, source, self._get_url().get_display_name(source)
             )
@@ -65,6 +72,12 @@ class DocumentSourceFactory:
             self._url.close()
             self._url = None
 
+    async def aclose(self) -> None:
+        """Close cached handlers, including async connection pools."""
+        if self._url:
+            await self._url.aclose()
+            self._url = None
+
 
 _factory: Optional[DocumentSourceFactory] = None
 
@@ -74,4 +87,12 @@ def get_source_factory() -> DocumentSourceFactory:
     global _factory
     if _factory is None:
         _factory = DocumentSourceFactory()
+        # Pools live as long as the process so warm connections are reused across tool calls
+        atexit.register(_factory.close)
     return _factory
+
+
+async def aclose_source_factory() -> None:
+    """Close the singleton's async connection pools, if the factory was ever created."""
+    if _factory is not None:
+        await _factory.aclose()
@@ -3,22 +3,36 @@ MCP tool definitions for Mistral OCR server with async concurrent processing.
 """
 
 import asyncio
+import re
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional
 
 from mcp.server.fastmcp import Context, FastMCP
 
 from .config import settings
+from .document_source import DocumentDescriptor
 from .constants import ALLOWED_EXTENSIONS, DEFAULT_MAX_FILE_SIZE_MB
 from .models import OCRResult, OCRPage, OCRImage, BatchOCRResult, SupportedFormats
 from .ocr_client import MistralOCRClient
 from .cache import OCRCache
-from .image_writer import ImageWriter
+from .rate_limiter import RateLimiter
+from .image_writer import ImageWriter, ImageWriteSummary
 from .markdown_writer import MarkdownWriter
-from .source_factory import get_source_factory
+from .source_factory import aclose_source_factory, get_source_factory
+from .utils import token_pattern
 
 _cache: Optional[OCRCache] = None
+_rate_limiter: Optional[RateLimiter] = None
+_ocr_client: Optional[MistralOCRClient] = None
+_io_executor: Optional[ThreadPoolExecutor] = None
+# Sessions currently inside ocr_lifespan (all on the server's event loop, so no lock)
+_active_lifespans = 0
+
+# Upper bound on concurrent markdown/image saves during a batch
+MAX_WRITE_WORKERS = 8
 
 
 def get_cache() -> Optional[OCRCache]:
@@ -30,25 +44,114 @@ def get_cache() -> Optional[OCRCache]:
         if settings:
             cache_dir = settings.cache_dir or str(Path(settings.output_dir) / ".cache")
         ttl = settings.cache_ttl_hours if settings else 168
-        _cache = OCRCache(cache_dir, ttl_hours=ttl)
+        memory_size = settings.cache_memory_size if settings else 50
+        _cache = OCRCache(cache_dir, ttl_hours=ttl, memory_cache_size=memory_size)
     return _cache
 
 
+def get_rate_limiter() -> Optional[RateLimiter]:
+    """Shared limiter so pacing applies across concurrent tool calls."""
+    global _rate_limiter
+    if not settings or settings.rate_limit_rps <= 0:
+        return None
+    if _rate_limiter is None:
+        _rate_limiter = RateLimiter(settings.rate_limit_rps)
+    return _rate_limiter
+
+
+def get_ocr_client() -> MistralOCRClient:
+    """Shared client so pooled connections are reused across tool calls. Requires settings."""
+    global _ocr_client
+    if _ocr_client is None:
+        _ocr_client = MistralOCRClient(
+            settings.api_key,
+            settings.ocr_model,
+            get_cache(),
+            api_base=settings.api_base,
+            max_retries=settings.max_retries,
+            rate_limiter=get_rate_limiter(),
+            upload_threshold_bytes=settings.upload_threshold_mb * 1024 * 1024,
+        )
+    return _ocr_client
+
+
+def get_io_executor() -> ThreadPoolExecutor:
+    """Dedicated pool for reading/downloading sources, so it never queues behind cache or write work."""
+    global _io_executor
+    if _io_executor is None:
+        workers = 2 * settings.max_concurrent if settings else 10
+        _io_executor = ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="ocr-io")
+    return _io_executor
+
+
+def _build_supported_formats() -> SupportedFormats:
+    if settings:
+        return SupportedFormats(
+            formats=list(settings.allowed_extensions),
+            max_file_size_mb=settings.max_file_size >> 20
+        )
+    return SupportedFormats(
+        formats=list(ALLOWED_EXTENSIONS),
+        max_file_size_mb=DEFAULT_MAX_FILE_SIZE_MB
+    )
+
+
+# Settings are immutable, so the capabilities response is built once
+_SUPPORTED_FORMATS = _build_supported_formats()
+
+
+def _write_images(
+    assets_dir: Path, link_base_dir: Path, images: List[dict]
+) -> tuple[list[dict], ImageWriteSummary]:
+    """Write images (creating the assets directory only if any are written). Blocking; run via asyncio.to_thread."""
+    return ImageWriter(assets_dir, link_base_dir=link_base_dir).write_images(images)
+
+
+# Error paths copy this instead of re-validating a full OCRResult each time
+_FAILURE_TEMPLATE = OCRResult.model_construct(
+    success=False, file_path="unknown", file_type="unknown", source_type="unknown",
+    from_cache=False, total_pages=0, pages=[], images=[], total_images=0,
+    model=None, usage={}, markdown_path=None, error_message=None, error_type=None,
+)
+
+
+def _failure_result(file_path: str, error_message: Optional[str], error_type: str, **fields) -> OCRResult:
+    """Build a failed OCRResult from the shared template (fresh containers, no validation)."""
+    return _FAILURE_TEMPLATE.model_copy(update={
+        "file_path": file_path, "error_message": error_message, "error_type": error_type,
+        "pages": [], "images": [], "usage": {}, **fields,
+    })
+
+
+def _source_key(source: str, is_url: bool) -> str:
+    """Canonical key used to collapse duplicate batch sources."""
+    if is_url:
+        return source
+    try:
+        return str(Path(source).resolve())
+    except (OSError, RuntimeError, ValueError):
+        return source
+
+
+# Checked in order; the first matching pattern decides the error type
+_VALIDATION_ERROR_PATTERNS = (
+    ("TimeoutError", token_pattern("timeout")),
+    # URL HTTP errors are reported as "HTTP <status>: <url>", so that marker is anchored
+    ("ConnectionError", re.compile(r"^http |connection failed", re.IGNORECASE)),
+    ("FileProcessingError", token_pattern("permission denied", "failed to read file")),
+)
+
+
 def _classify_validation_error(error: str) -> str:
     """Classify validation error into error type."""
-    err_lower = error.lower()
-    if "timeout" in err_lower:
-        return "TimeoutError"
-    if err_lower.startswith("http ") or "connection failed" in err_lower:
-        return "ConnectionError"
-    if "permission denied" in err_lower or "failed to read file" in err_lower:
-        return "FileProcessingError"
+    for error_type, pattern in _VALIDATION_ERROR_PATTERNS:
+        if pattern.search(error):
+            return error_type
     return "ValidationError"
 
 
 async def _process_single(
-    source: str,
-    is_url: bool,
+    descriptor: DocumentDescriptor,
     include_images: bool,
     save_images: bool,
     bypass_cache: bool,
@@ -58,44 +161,28 @@ async def _process_single(
     factory,
 ) -> OCRResult:
     """Process a single document."""
-    try:
-        descriptor = factory.create_descriptor(
-            file_path=None if is_url else source,
-            url=source if is_url else None
-        )
-    except ValueError as e:
-        return OCRResult(
-            success=False, file_path=source, file_type="unknown",
-            source_type="unknown", total_pages=0, pages=[],
-            error_message=str(e), error_type="ValidationError"
-        )
-
     source_handler = factory.get_source(descriptor)
+    if bypass_cache:
+        source_handler.invalidate(descriptor.identifier)
 
     # Validate and encode
-    result = await asyncio.to_thread(source_handler.validate_and_encode, descriptor.identifier)
+    result = await source_handler.validate_and_encode_async(descriptor.identifier, get_io_executor())
     if not result.success:
         err = result.error or "Validation failed"
-        return OCRResult(
-            success=False, file_path=descriptor.identifier,
-            file_type="unknown", source_type=descriptor.source_type.value,
-            total_pages=0, pages=[], error_message=err, error_type=_classify_validation_error(err)
+        return _failure_result(
+            descriptor.identifier, err, _classify_validation_error(err),
+            source_type=descriptor.source_type.value,
         )
     if not result.data or not result.mime_type:
-        return OCRResult(
-            success=False,
-            file_path=descriptor.identifier,
-            file_type="unknown",
-            source_type=descriptor.source_type.value,
-            total_pages=0,
-            pages=[],
-            error_message="Validation succeeded but returned no data/mime_type",
-            error_type="ValidationError",
+        return _failure_result(
+            descriptor.identifier, "Validation succeeded but returned no data/mime_type",
+            "ValidationError", source_type=descriptor.source_type.value,
         )
 
+    file_type = source_handler.get_file_type(descriptor.identifier) or "unknown"
+
     # OCR processing
-    ocr_result = await asyncio.to_thread(
-        client.process_document,
+    ocr_result = await client.process_document_async(
         result.data,
         result.mime_type,
         include_images,
@@ -106,30 +193,30 @@ async def _process_single(
     )
 
     if not ocr_result["success"]:
-        return OCRResult(
-            success=False, file_path=descriptor.identifier,
-            file_type=source_handler.get_file_type(descriptor.identifier) or "unknown",
-            source_type=descriptor.source_type.value, total_pages=0, pages=[],
+        return _failure_result(
+            descriptor.identifier, ocr_result.get("error"),
+            ocr_result.get("error_type") or "APIError",
+            file_type=file_type,
+            source_type=descriptor.source_type.value,
             model=ocr_result.get("model"),
             usage=ocr_result.get("usage") or {},
             from_cache=bool(ocr_result.get("_from_cache", False)),
-            error_message=ocr_result.get("error"),
-            error_type=ocr_result.get("error_type") or "APIError",
         )
 
-    # Build response
-    pages = [OCRPage(
+    # Build response (data was shaped by MistralOCRClient, so skip re-validation).
+    # Popping the raw lists lets them be freed as soon as the models exist.
+    pages = [OCRPage.model_construct(
         index=p["index"],
         markdown=p["markdown"],
         dimensions=p.get("dimensions"),
         images=p.get("images", []),
-    ) for p in ocr_result["pages"]]
+    ) for p in ocr_result.pop("pages")]
 
-    images = [OCRImage(**img) for img in ocr_result["images"]]
+    images = [OCRImage.model_construct(**img) for img in ocr_result.pop("images")]
 
     return OCRResult(
         success=True, file_path=descriptor.identifier,
-        file_type=source_handler.get_file_type(descriptor.identifier) or "unknown",
+        file_type=file_type,
         source_type=descriptor.source_type.value, total_pages=len(pages),
         pages=pages, images=images, total_images=ocr_result.get("total_images", len(images)),
         model=ocr_result.get("model"),
@@ -138,6 +225,35 @@ async def _process_single(
     )
 
 
+async def _close_shared_resources() -> None:
+    """Close process-wide pools; each is recreated lazily on next use."""
+    global _io_executor
+    if _ocr_client is not None:
+        await _ocr_client.aclose()
+    await aclose_source_factory()
+    if _io_executor is not None:
+        _io_executor.shutdown(wait=False)
+        _io_executor = None
+
+
+@asynccontextmanager
+async def ocr_lifespan(server: FastMCP) -> AsyncIterator[None]:
+    """Server lifespan that closes shared pools once the last session ends.
+
+    SSE/HTTP transports enter the lifespan per session, while the pools are shared by
+    all of them, so only the last exit closes them. Async pools belong to the server's
+    event loop, so they can't be closed from atexit.
+    """
+    global _active_lifespans
+    _active_lifespans += 1
+    try:
+        yield
+    finally:
+        _active_lifespans -= 1
+        if _active_lifespans == 0:
+            await _close_shared_resources()
+
+
 def register_ocr_tools(mcp: FastMCP) -> None:
     """Register all OCR tools with FastMCP server."""
 
@@ -167,25 +283,18 @@ def register_ocr_tools(mcp: FastMCP) -> None:
             OCRResult with extracted text, images/figures/charts metadata
         """
         if (file_path is None) == (url is None):
-            return OCRResult(
-                success=False, file_path="unknown", file_type="unknown",
-                source_type="unknown", total_pages=0, pages=[],
-                error_message="Provide exactly one of 'file_path' or 'url'",
-                error_type="ValidationError",
+            return _failure_result(
+                "unknown", "Provide exactly one of 'file_path' or 'url'", "ValidationError"
             )
 
         if not settings or not settings.api_key:
-            return OCRResult(
-                success=False, file_path=file_path or url or "unknown",
-                file_type="unknown", source_type="unknown", total_pages=0,
-                pages=[], error_message="MISTRAL_API_KEY not configured", error_type="ConfigurationError"
+            return _failure_result(
+                file_path or url or "unknown", "MISTRAL_API_KEY not configured", "ConfigurationError"
             )
 
         factory = get_source_factory()
-        cache = get_cache()
 
         source = url or file_path
-        is_url = url is not None
         min_size = image_min_size if image_min_size is not None else settings.image_min_size
         resolved_output_dir = str(Path(output_dir).resolve()) if output_dir else settings.output_dir
         await ctx.info(f"Processing: {source}")
@@ -199,20 +308,19 @@ def register_ocr_tools(mcp: FastMCP) -> None:
             markdown_path = writer.reserve_path(base)
             assets_dir = writer.assets_dir_for_markdown(markdown_path)
 
+        try:
+            descriptor = factory.create_descriptor(file_path=file_path, url=url)
+        except ValueError as e:
+            return _failure_result(source, str(e), "ValidationError")
+
         result = await _process_single(
-            source,
-            is_url,
+            descriptor,
             include_images,
             save_images,
             bypass_cache,
             min_size,
             image_limit,
-            MistralOCRClient(
-                settings.api_key,
-                settings.ocr_model,
-                cache,
-                api_base=settings.api_base,
-            ),
+            get_ocr_client(),
             factory,
         )
 
@@ -222,18 +330,14 @@ def register_ocr_tools(mcp: FastMCP) -> None:
         # Save extracted images (optionally stripping base64 from the response)
         if result.success and save_images and assets_dir and markdown_path:
             try:
-                image_writer = ImageWriter(assets_dir, link_base_dir=markdown_path.parent)
-                updated_images, summary = image_writer.write_images(
-                    [i.model_dump() for i in result.images]
+                updated_images, summary = await asyncio.to_thread(
+                    _write_images, assets_dir, markdown_path.parent, [i.model_dump() for i in result.images]
                 )
                 if not include_images:
                     for img in updated_images:
                         img["image_base64"] = None
-                result = OCRResult(
-                    **{
-                        **result.model_dump(),
-                        "images": [OCRImage(**img) for img in updated_images],
-                    }
+                result = result.model_copy(
+                    update={"images": [OCRImage.model_construct(**img) for img in updated_images]}
                 )
                 await ctx.info(
                     f"Saved {summary.written} images to {summary.assets_dir} (skipped {summary.skipped}, failed {summary.failed})"
@@ -244,15 +348,15 @@ def register_ocr_tools(mcp: FastMCP) -> None:
         # Save markdown
         if result.success and save_markdown and writer and markdown_path:
             try:
-                write_result = writer.write_ocr_result({
+                write_result = await asyncio.to_thread(writer.write_ocr_result, {
                     'file_path': result.file_path,
                     'file_type': result.file_type,
                     'model': result.model,
-                    'pages': [p.model_dump() for p in result.pages],
-                    'images': [i.model_dump() for i in result.images]
+                    'pages': result.pages,
+                    'images': result.images,
                 }, output_path=str(markdown_path))
                 if write_result.success:
-                    result = OCRResult(**{**result.model_dump(), 'markdown_path': write_result.file_path})
+                    result = result.model_copy(update={'markdown_path': write_result.file_path})
                     await ctx.info(f"Saved: {write_result.file_path}")
             except Exception as e:
                 await ctx.error(f"Markdown save failed: {e}")
@@ -305,118 +409,132 @@ def register_ocr_tools(mcp: FastMCP) -> None:
         await ctx.info(f"Batch processing {len(sources)} sources (max {concurrent} concurrent)")
 
         factory = get_source_factory()
-        cache = get_cache()
         semaphore = asyncio.Semaphore(concurrent)
 
-        # Reuse single client for all batch requests (connection pooling)
-        client = MistralOCRClient(
-            settings.api_key,
-            settings.ocr_model,
-            cache,
-            api_base=settings.api_base,
-        )
+        # Reuse the shared client for all batch requests (connection pooling)
+        client = get_ocr_client()
 
-        async def process_with_semaphore(src: str, idx: int) -> OCRResult:
-            async with semaphore:
-                descriptor = factory.create_descriptor_auto(src)
-                await ctx.info(f"[{idx + 1}/{len(sources)}] {src}")
-                return await _process_single(
-                    src,
-                    descriptor.is_url,
-                    include_images,
-                    save_images,
-                    bypass_cache,
-                    min_size,
-                    image_limit,
-                    client,
-                    factory,
+        writer: Optional[MarkdownWriter] = None
+        if save_markdown or save_images:
+            try:
+                writer = MarkdownWriter(resolved_output_dir)
+            except Exception as e:
+                await ctx.error(f"Batch markdown save failed: {e}")
+        batch_name = f"batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+
+        def save_one(idx: int, r: OCRResult) -> OCRResult:
+            """Write images/markdown for one result. Blocking; run via asyncio.to_thread."""
+            base = f"{batch_name}_{idx:02d}_{writer.derive_filename(r.file_path)}"
+            md_path = writer.reserve_path(base)
+            assets_dir = writer.assets_dir_for_markdown(md_path)
+
+            if save_images:
+                images_dicts, _ = _write_images(
+                    assets_dir, md_path.parent, [img.model_dump() for img in r.images]
                 )
-
-        try:
-            tasks = [process_with_semaphore(src, idx) for idx, src in enumerate(sources)]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-
-            final_results, errors = [], []
-            successful, failed = 0, 0
-
-            for src, result in zip(sources, results):
-                if isinstance(result, Exception):
-                    failed += 1
-                    errors.append(f"{src}: {result}")
-                    final_results.append(OCRResult(
-                        success=False, file_path=src, file_type="unknown",
-                        source_type="unknown", total_pages=0, pages=[],
-                        error_message=str(result), error_type="UnhandledError"
-                    ))
-                elif result.success:
-                    successful += 1
-                    final_results.append(result)
-                else:
-                    failed += 1
-                    errors.append(f"{src}: {result.error_message}")
-                    final_results.append(result)
-
-            await ctx.info(f"Completed: {successful} succeeded, {failed} failed")
-
-            # Save batch markdown + images
-            if successful > 0 and (save_markdown or save_images):
+                if not include_images:
+                    for img in images_dicts:
+                        img["image_base64"] = None
+                r = r.model_copy(update={"images": [OCRImage.model_construct(**img) for img in images_dicts]})
+
+            if save_markdown:
+                write_result = writer.write_ocr_result(
+                    {
+                        "file_path": r.file_path,
+                        "file_type": r.file_type,
+                        "model": r.model,
+                        "pages": r.pages,
+                        "images": r.images,
+                    },
+                    base_filename=base,
+                    output_path=str(md_path),
+                )
+                if write_result.success:
+                    r = r.model_copy(update={"markdown_path": write_result.file_path})
+            return r
+
+        # Each distinct document is processed once (descriptors are built here and handed
+        # straight to _process_single) and fanned back out to every index naming it
+        final_results: list[Optional[OCRResult]] = [None] * len(sources)
+        unique: dict[str, DocumentDescriptor] = {}
+        indices_by_key: dict[str, list[int]] = {}
+        for i, src in enumerate(sources):
+            try:
+                descriptor = factory.create_descriptor_auto(src)
+                key = _source_key(src, descriptor.is_url)
+            except Exception as e:
+                # A malformed source fails only its own entry, not the whole batch
+                final_results[i] = _failure_result(src, str(e), "ValidationError")
+                continue
+            unique.setdefault(key, descriptor)
+            indices_by_key.setdefault(key, []).append(i)
+
+        # Saves run outside the OCR semaphore, so bound them separately
+        save_semaphore = asyncio.Semaphore(min(concurrent, MAX_WRITE_WORKERS))
+
+        async def save_at(i: int, result: OCRResult) -> None:
+            if result.file_path != sources[i]:
+                # Duplicate spelled differently (e.g. relative vs absolute path)
+                result = result.model_copy(update={"file_path": sources[i]})
+            if result.success and writer:
                 try:
-                    writer = MarkdownWriter(resolved_output_dir)
-                    batch_name = f"batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-                    successful_indices = [i for i, r in enumerate(final_results) if r.success]
-                    for idx, i in enumerate(successful_indices):
-                        r = final_results[i]
-                        base = f"{batch_name}_{idx:02d}_{writer.derive_filename(r.file_path)}"
-                        md_path = writer.reserve_path(base)
-                        assets_dir = writer.assets_dir_for_markdown(md_path)
-
-                        images_dicts = [img.model_dump() for img in r.images]
-                        if save_images:
-                            image_writer = ImageWriter(assets_dir, link_base_dir=md_path.parent)
-                            images_dicts, _ = image_writer.write_images(images_dicts)
-                            if not include_images:
-                                for img in images_dicts:
-                                    img["image_base64"] = None
-                            r = OCRResult(**{**r.model_dump(), "images": [OCRImage(**img) for img in images_dicts]})
-
-                        if save_markdown:
-                            write_result = writer.write_ocr_result(
-                                {
-                                    "file_path": r.file_path,
-                                    "file_type": r.file_type,
-                                    "model": r.model,
-                                    "pages": [p.model_dump() for p in r.pages],
-                                    "images": [img.model_dump() for img in r.images],
-                                },
-                                base_filename=base,
-                                output_path=str(md_path),
-                            )
-                            if write_result.success:
-                                r = OCRResult(**{**r.model_dump(), "markdown_path": write_result.file_path})
-
-                        final_results[i] = r
+                    # reserve_path picks unique names, so saves can run in parallel
+                    async with save_semaphore:
+                        result = await asyncio.to_thread(save_one, i, result)
                 except Exception as e:
-                    await ctx.error(f"Batch markdown save failed: {e}")
+                    await ctx.error(f"Batch save failed for {sources[i]}: {e}")
+            final_results[i] = result
 
-            return BatchOCRResult(
-                total_files=len(sources), successful=successful, failed=failed,
-                results=final_results, errors=errors
-            )
-        finally:
-            factory.close()
+        async def process_and_save(key: str, descriptor: DocumentDescriptor, idx: int) -> None:
+            async with semaphore:
+                await ctx.info(f"[{idx + 1}/{len(unique)}] {descriptor.identifier}")
+                try:
+                    result = await _process_single(
+                        descriptor,
+                        include_images,
+                        save_images,
+                        bypass_cache,
+                        min_size,
+                        image_limit,
+                        client,
+                        factory,
+                    )
+                except Exception as e:
+                    result = _failure_result(descriptor.identifier, str(e), "UnhandledError")
+            # Saving starts as soon as this document is done and outside the semaphore,
+            # so it overlaps with OCR of the remaining sources
+            await asyncio.gather(*(save_at(i, result) for i in indices_by_key[key]))
+
+        outcomes = await asyncio.gather(
+            *(process_and_save(key, d, idx) for idx, (key, d) in enumerate(unique.items())),
+            return_exceptions=True,
+        )
+        # Anything escaping a task (e.g. a ctx.info failure) fails only that document's entries
+        for key, outcome in zip(unique, outcomes):
+            if isinstance(outcome, BaseException):
+                for i in indices_by_key[key]:
+                    if final_results[i] is None:
+                        final_results[i] = _failure_result(sources[i], str(outcome), "UnhandledError")
+
+        errors = []
+        successful = 0
+        for src, result in zip(sources, final_results):
+            if result.success:
+                successful += 1
+            else:
+                errors.append(f"{src}: {result.error_message}")
+        failed = len(sources) - successful
+        await ctx.info(f"Completed: {successful} succeeded, {failed} failed")
+
+        return BatchOCRResult(
+            total_files=len(sources), successful=successful, failed=failed,
+            results=final_results, errors=errors
+        )
 
     @mcp.tool()
     async def ocr_get_supported_formats(ctx: Context) -> SupportedFormats:
         """Get supported file formats and size limits."""
-        if settings:
-            return SupportedFormats(
-                formats=list(settings.allowed_extensions),
-                max_file_size_mb=settings.max_file_size // (1024 * 1024)
-            )
-        return SupportedFormats(
-            formats=list(ALLOWED_EXTENSIONS),
-            max_file_size_mb=DEFAULT_MAX_FILE_SIZE_MB
-        )
+        return _SUPPORTED_FORMATS
 
     @mcp.tool()
     async def ocr_clear_cache(ctx: Context) -> dict:
@@ -2,11 +2,15 @@
 URL document source for OCR processing.
 """
 
-import base64
+import asyncio
+import bisect
 import ipaddress
 import logging
+import re
 import socket
-from pathlib import Path
+import threading
+import time
+from collections import OrderedDict
 from typing import Optional
 from urllib.parse import urljoin, urlparse, ParseResult
 
@@ -18,7 +22,7 @@ from .constants import (
     ALLOWED_EXTENSIONS, ALLOWED_MIME_TYPES, DEFAULT_MAX_FILE_SIZE_BYTES,
     get_file_type, get_mime_type
 )
-from .utils import extract_filename_from_url, sanitize_filename
+from .utils import HTTP2_ENABLED, extract_filename_from_url, sanitize_filename, split_url_filename, url_path
 
 logger = logging.getLogger(__name__)
 
@@ -35,12 +39,42 @@ BLOCKED_IP_RANGES = [
 ]
 
 
+def _build_blocked_bounds(networks) -> dict[int, tuple[list[int], list[int]]]:
+    """Per IP version, sorted (starts, ends) integer bounds for bisect lookups."""
+    bounds: dict[int, tuple[list[int], list[int]]] = {}
+    for version in (4, 6):
+        # collapse_addresses merges adjacent/overlapping entries and returns them sorted
+        collapsed = ipaddress.collapse_addresses(n for n in networks if n.version == version)
+        ranges = [(int(n.network_address), int(n.broadcast_address)) for n in collapsed]
+        bounds[version] = ([start for start, _ in ranges], [end for _, end in ranges])
+    return bounds
+
+
+# Content types that say nothing about the document, so the URL suffix decides instead
+_GENERIC_CONTENT_TYPES = frozenset({'', 'application/octet-stream', 'binary/octet-stream'})
+
+# Only strings shaped like IP literals are parsed; hostnames skip ip_address's raise/catch
+# (urlparse strips IPv6 brackets, so any ':' in a hostname means an IPv6 literal)
+_IPV4_LITERAL_RE = re.compile(r'\d{1,3}(?:\.\d{1,3}){3}')
+
+# Collapsed ranges are disjoint, so the nearest start at or below an address decides membership
+_BLOCKED_BOUNDS = _build_blocked_bounds(BLOCKED_IP_RANGES)
+
+
 class URLSource(DocumentSource):
     """Handles documents accessible via HTTP(S) URLs."""
 
     TIMEOUT = 30
-    ALLOWED_SCHEMES = {'http', 'https'}
+    ALLOWED_SCHEMES = frozenset({'http', 'https'})
     REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+    # Hosts that resolved only to public addresses skip DNS for this long (failures are never cached)
+    SAFE_HOST_TTL_SECONDS = 60.0
+    SAFE_HOST_CACHE_SIZE = 1024
+    # Recently downloaded documents are reused for repeat requests of the same URL (successes only)
+    RECENT_RESULT_TTL_SECONDS = 300.0
+    # Kept small: the OCR result cache already covers repeated content
+    RECENT_RESULT_CACHE_SIZE = 16
+    RECENT_RESULT_MAX_BYTES = 32 * 1024 * 1024
 
     def __init__(self, max_file_size: Optional[int] = None, timeout: int = TIMEOUT):
         self.max_file_size = max_file_size or (
@@ -51,60 +85,136 @@ class URLSource(DocumentSource):
         self.allow_nonstandard_ports = settings.url_allow_nonstandard_ports if settings else False
         self._allowed = settings.allowed_extensions if settings else ALLOWED_EXTENSIONS
         self._client: Optional[httpx.Client] = None
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._safe_hosts: dict[str, float] = {}
+        self._safe_hosts_lock = threading.Lock()
+        self._recent: OrderedDict[str, tuple[float, ValidationResult]] = OrderedDict()
+        self._recent_bytes = 0
+        self._recent_lock = threading.Lock()
+
+    def _client_options(self) -> dict:
+        return {
+            'timeout': httpx.Timeout(self.timeout),
+            'follow_redirects': False,
+            'headers': {'User-Agent': 'MistralOCR-MCP/1.0'},
+            'http2': HTTP2_ENABLED,
+            'limits': httpx.Limits(
+                max_keepalive_connections=32,
+                max_connections=64,
+                keepalive_expiry=60.0
+            ),
+        }
 
     @property
     def client(self) -> httpx.Client:
         if self._client is None:
-            self._client = httpx.Client(
-                timeout=httpx.Timeout(self.timeout),
-                follow_redirects=False,
-                headers={'User-Agent': 'MistralOCR-MCP/1.0'},
-                limits=httpx.Limits(
-                    max_keepalive_connections=10,
-                    max_connections=20,
-                    keepalive_expiry=30.0
-                )
-            )
+            self._client = httpx.Client(**self._client_options())
         return self._client
 
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        """Lazily created pooled client for downloads made from the event loop."""
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(**self._client_options())
+        return self._async_client
+
     def validate_and_encode(self, url: str) -> ValidationResult:
-        """Validate URL and encode content to base64."""
+        """Validate URL and download its content."""
+        cached = self._recent_result(url)
+        if cached:
+            return cached
+        try:
+            result = self._build_result(url, *self._download_following_redirects(url))
+        except Exception as e:
+            return self._failure_for(url, e)
+        return self._remember_result(url, result)
+
+    async def validate_and_encode_async(self, url: str, executor=None) -> ValidationResult:
+        """Async variant of validate_and_encode; downloads without occupying a worker thread."""
+        cached = self._recent_result(url)
+        if cached:
+            return cached
         try:
-            data, content_type, parsed = self._download_following_redirects(url)
+            result = self._build_result(url, *await self._download_following_redirects_async(url))
+        except Exception as e:
+            return self._failure_for(url, e)
+        return self._remember_result(url, result)
+
+    def invalidate(self, url: str) -> None:
+        with self._recent_lock:
+            entry = self._recent.pop(url, None)
+            if entry:
+                self._recent_bytes -= entry[1].size_bytes
+
+    def _purge_expired(self, now: float) -> None:
+        """Drop expired entries; caller holds _recent_lock.
 
-            if len(data) > self.max_file_size:
-                return ValidationResult.failure(
-                    f'Content too large: {len(data) / 1024 / 1024:.1f}MB'
-                )
+        Entries are never reordered and share one TTL, so insertion order is expiry order.
+        """
+        while self._recent:
+            url, (expires, result) = next(iter(self._recent.items()))
+            if expires > now:
+                break
+            del self._recent[url]
+            self._recent_bytes -= result.size_bytes
 
-            if not data:
-                return ValidationResult.failure(f'Empty content: {url}')
+    def _recent_result(self, url: str) -> Optional[ValidationResult]:
+        with self._recent_lock:
+            self._purge_expired(time.monotonic())
+            entry = self._recent.get(url)
+            return entry[1] if entry else None
 
-            mime = self._resolve_mime(content_type, parsed)
-            if mime not in ALLOWED_MIME_TYPES:
-                return ValidationResult.failure(f'Unsupported type: {mime}')
+    def _remember_result(self, url: str, result: ValidationResult) -> ValidationResult:
+        """Remember a successful result and return the (shareable) result to hand out."""
+        if not result.success or result.size_bytes > self.RECENT_RESULT_MAX_BYTES:
+            return result
+        # The download buffer is a bytearray; shared results must not be mutable
+        result = ValidationResult.ok(bytes(result.data), result.mime_type, result.size_bytes)
+        with self._recent_lock:
+            now = time.monotonic()
+            self._purge_expired(now)
+            old = self._recent.pop(url, None)
+            if old:
+                self._recent_bytes -= old[1].size_bytes
+            while self._recent and (
+                len(self._recent) >= self.RECENT_RESULT_CACHE_SIZE
+                or self._recent_bytes + result.size_bytes > self.RECENT_RESULT_MAX_BYTES
+            ):
+                _, (_, evicted) = self._recent.popitem(last=False)
+                self._recent_bytes -= evicted.size_bytes
+            self._recent[url] = (now + self.RECENT_RESULT_TTL_SECONDS, result)
+            self._recent_bytes += result.size_bytes
+        return result
 
-            return ValidationResult.ok(
-                base64.b64encode(data).decode('utf-8'), mime, len(data)
-            )
+    def _build_result(self, url: str, data: bytes, content_type: str, parsed: ParseResult) -> ValidationResult:
+        # Size was already enforced while streaming (_check_response / _append_chunk)
+        if not data:
+            return ValidationResult.failure(f'Empty content: {url}')
 
-        except httpx.TimeoutException:
+        mime = self._resolve_mime(content_type, parsed)
+        if mime not in ALLOWED_MIME_TYPES:
+            return ValidationResult.failure(f'Unsupported type: {mime}')
+
+        return ValidationResult.ok(data, mime, len(data))
+
+    @staticmethod
+    def _failure_for(url: str, error: Exception) -> ValidationResult:
+        if isinstance(error, httpx.TimeoutException):
             return ValidationResult.failure(f'Timeout: {url}')
-        except httpx.HTTPStatusError as e:
-            return ValidationResult.failure(f'HTTP {e.response.status_code}: {url}')
-        except httpx.ConnectError:
+        if isinstance(error, httpx.HTTPStatusError):
+            return ValidationResult.failure(f'HTTP {error.response.status_code}: {url}')
+        if isinstance(error, httpx.ConnectError):
             return ValidationResult.failure(f'Connection failed: {url}')
-        except ValueError as e:
-            return ValidationResult.failure(str(e))
-        except Exception as e:
-            return ValidationResult.failure(f'Error: {e}')
+        if isinstance(error, ValueError):
+            return ValidationResult.failure(str(error))
+        return ValidationResult.failure(f'Error: {error}')
 
     def get_display_name(self, url: str) -> str:
         return sanitize_filename(extract_filename_from_url(url), url)
 
     def get_file_type(self, url: str) -> Optional[str]:
         try:
-            return get_file_type(Path(urlparse(url).path).suffix)
+            return get_file_type(split_url_filename(url_path(url))[1])
         except Exception:
             return None
 
@@ -113,8 +223,26 @@ class URLSource(DocumentSource):
             self._client.close()
             self._client = None
 
-    def __del__(self):
+    async def aclose(self) -> None:
+        """Close both the sync and the async connection pools."""
         self.close()
+        if self._async_client:
+            await self._async_client.aclose()
+            self._async_client = None
+
+    # No __del__: the shared instance is closed via the factory's atexit hook; ad-hoc instances
+    # should be used as context managers
+    def __enter__(self) -> "URLSource":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    async def __aenter__(self) -> "URLSource":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
 
     def _validate_url(self, url: str) -> ParseResult:
         parsed = urlparse(url)
@@ -130,59 +258,129 @@ class URLSource(DocumentSource):
         return parsed
 
     def _check_hostname(self, hostname: str) -> None:
-        try:
-            ip = ipaddress.ip_address(hostname)
-            self._check_ip(ip)
+        if ':' in hostname or _IPV4_LITERAL_RE.fullmatch(hostname):
+            try:
+                ip = ipaddress.ip_address(hostname)
+            except ValueError:
+                ip = None
+            if ip is not None:
+                self._check_ip(ip)
+                return
+
+        now = time.monotonic()
+        with self._safe_hosts_lock:
+            expires = self._safe_hosts.get(hostname)
+        if expires is not None and expires > now:
             return
-        except ValueError:
-            pass
 
         try:
-            for _, _, _, _, sockaddr in socket.getaddrinfo(hostname, None):
+            # One entry per address (not per socket type); AI_ADDRCONFIG is deliberately not
+            # used, as skipping a family here would leave its records unchecked for the connect
+            for _, _, _, _, sockaddr in socket.getaddrinfo(hostname, None, type=socket.SOCK_STREAM):
                 self._check_ip(ipaddress.ip_address(sockaddr[0]))
         except socket.gaierror as e:
             raise ValueError(f"DNS resolution failed for {hostname}: {e}")
 
+        with self._safe_hosts_lock:
+            if len(self._safe_hosts) >= self.SAFE_HOST_CACHE_SIZE:
+                self._safe_hosts.clear()
+            self._safe_hosts[hostname] = now + self.SAFE_HOST_TTL_SECONDS
+
     def _check_ip(self, ip) -> None:
-        for blocked in BLOCKED_IP_RANGES:
-            if ip.version == blocked.version and ip in blocked:
-                raise ValueError(f'Internal address blocked: {ip}')
+        starts, ends = _BLOCKED_BOUNDS[ip.version]
+        value = int(ip)
+        idx = bisect.bisect_right(starts, value) - 1
+        if idx >= 0 and value <= ends[idx]:
+            raise ValueError(f'Internal address blocked: {ip}')
+
+    def _redirect_target(self, resp: httpx.Response, current: str, hop: int) -> Optional[str]:
+        """Return the next URL for a redirect response, or None if resp is final."""
+        if resp.status_code not in self.REDIRECT_STATUSES:
+            return None
+        if hop >= self.max_redirects:
+            raise ValueError("Too many redirects")
+        location = resp.headers.get("location")
+        if not location:
+            raise ValueError("Redirect missing Location header")
+        return urljoin(current, location)
+
+    def _check_response(self, resp: httpx.Response) -> tuple[str, int]:
+        """Raise for error statuses or an oversized Content-Length.
+
+        Returns the content type and the declared length (0 when absent or invalid).
+        """
+        resp.raise_for_status()
+        content_len = 0
+        length = resp.headers.get("content-length")
+        if length:
+            try:
+                content_len = max(int(length), 0)
+            except ValueError:
+                content_len = 0
+            if content_len > self.max_file_size:
+                raise ValueError(f"Content too large: {content_len / 1024 / 1024:.1f}MB")
+        content_type = resp.headers.get("content-type", "").split(";", 1)[0].strip().lower()
+        return content_type, content_len
 
-    def _download_following_redirects(self, url: str) -> tuple[bytes, str, ParseResult]:
+    def _append_chunk(self, buf: bytearray, pos: int, chunk: bytes) -> int:
+        """Copy chunk into buf at pos and return the new write position.
+
+        Within a buffer preallocated from Content-Length this is an in-place
+        copy; past its end (or with no declared length) the bytearray grows.
+        """
+        end = pos + len(chunk)
+        if end > self.max_file_size:
+            raise ValueError(f"Content too large: {end / 1024 / 1024:.1f}MB")
+        buf[pos:end] = chunk
+        return end
+
+    def _download_following_redirects(self, url: str) -> tuple[bytearray, str, ParseResult]:
         current = url
         for hop in range(self.max_redirects + 1):
             parsed = self._validate_url(current)
             with self.client.stream("GET", parsed.geturl()) as resp:
-                if resp.status_code in self.REDIRECT_STATUSES:
-                    if hop >= self.max_redirects:
-                        raise ValueError("Too many redirects")
-                    location = resp.headers.get("location")
-                    if not location:
-                        raise ValueError("Redirect missing Location header")
-                    current = urljoin(current, location)
+                next_url = self._redirect_target(resp, current, hop)
+                if next_url:
+                    current = next_url
                     continue
 
-                resp.raise_for_status()
-                content_type = resp.headers.get("content-type", "").split(";")[0].strip()
-                length = resp.headers.get("content-length")
-                if length:
-                    try:
-                        content_len = int(length)
-                    except ValueError:
-                        content_len = None
-                    if content_len and content_len > self.max_file_size:
-                        raise ValueError(f"Content too large: {content_len / 1024 / 1024:.1f}MB")
-
-                buf = bytearray()
+                content_type, content_len = self._check_response(resp)
+                buf = bytearray(content_len)
+                pos = 0
                 for chunk in resp.iter_bytes():
-                    buf.extend(chunk)
-                    if len(buf) > self.max_file_size:
-                        raise ValueError(f"Content too large: {len(buf) / 1024 / 1024:.1f}MB")
-                return bytes(buf), content_type, parsed
+                    pos = self._append_chunk(buf, pos, chunk)
+                # Drop any unused preallocation if the body was shorter than declared
+                del buf[pos:]
+                # Returned as-is: a bytes() copy would briefly double peak memory per document
+                return buf, content_type, parsed
+
+        raise ValueError("Too many redirects")
+
+    async def _download_following_redirects_async(self, url: str) -> tuple[bytearray, str, ParseResult]:
+        current = url
+        for hop in range(self.max_redirects + 1):
+            # SSRF validation resolves DNS synchronously, so keep it off the event loop
+            parsed = await asyncio.to_thread(self._validate_url, current)
+            async with self.async_client.stream("GET", parsed.geturl()) as resp:
+                next_url = self._redirect_target(resp, current, hop)
+                if next_url:
+                    current = next_url
+                    continue
+
+                content_type, content_len = self._check_response(resp)
+                buf = bytearray(content_len)
+                pos = 0
+                async for chunk in resp.aiter_bytes():
+                    pos = self._append_chunk(buf, pos, chunk)
+                # Drop any unused preallocation if the body was shorter than declared
+                del buf[pos:]
+                return buf, content_type, parsed
 
         raise ValueError("Too many redirects")
 
     def _resolve_mime(self, content_type: str, parsed: ParseResult) -> str:
-        if content_type and content_type.startswith(('application/', 'image/', 'text/')):
+        # Only a missing or generic type defers to the URL suffix; any other type is returned
+        # as-is so a disallowed one (e.g. an HTML error page at a .pdf URL) is rejected
+        if content_type not in _GENERIC_CONTENT_TYPES:
             return content_type
-        return get_mime_type(Path(parsed.path).suffix)
+        return get_mime_type(split_url_filename(parsed.path)[1])